@@ -1,16 +1,24 @@
 import re  # for sanitizing mod_names
+import os  # for walking and renaming the workshop directory
+import stat  # for reading directory stat results
 from pathlib import Path, PurePath  # for file-handling operations
 from datetime import datetime  # for comparing timestamps for mod updates
-import urllib.request  # for reaching Steam Workshop webpages
-import urllib.error  # for catching issues with urllib returning
-import threading  # to speed up requests for getting mod data
+import threading  # for locking data shared between request threads
+from concurrent.futures import ThreadPoolExecutor, as_completed  # to request, check and lowercase mods concurrently
 import subprocess
+import json  # for the changelog cache file
+import time  # for expiring cached changelog results and backing off SteamCMD retries
+import atexit  # for saving the changelog cache when the script exits
+from email.utils import formatdate  # for conditional If-Modified-Since requests
+from graphlib import TopologicalSorter  # for sorting mod dependencies
+import html  # for unescaping links in the Arma 3 Launcher html
 import argparse
 from getpass import getpass
 
 # Non-core modules
-import networkx as nx  # for sorting mod dependencies
-from bs4 import BeautifulSoup  # to scrape Steam Workshop webpages of information
+from selectolax.lexbor import LexborHTMLParser  # to scrape Steam Workshop webpages of information
+import requests  # for reaching Steam Workshop webpages over kept-alive connections
+from requests.adapters import HTTPAdapter
 
 STEAM_CMD = 'steamcmd'  # SteamCMD reference, either the environment variable, or the path to the shell
 SERVER_ID = '233780'  # Steam ID for Arma 3's Server Software'
@@ -20,6 +28,22 @@ WORKSHOP_DIR = SERVER_DIR / 'steamapps/workshop/content' / WORKSHOP_ID  # Direct
 MODS_DIR = SERVER_DIR / 'mods'  # Directory mods will be referenced from to the game
 KEYS_DIR = SERVER_DIR / 'keys'  # Key directory for mods.
 PARAM_FILE = SERVER_DIR / 'mods.txt'  # The script for starting the server.
+MOD_REQUEST_THREADS = 16  # Concurrent requests for mod information.
+LOWERCASE_THREADS = (os.cpu_count() or 1) * 2  # Mod directories lowercased at once, renames are I/O bound.
+MAX_INSTALL_ATTEMPTS = 5  # Times SteamCMD is re-run for mods that failed to download before giving up.
+HREF_PATTERN = re.compile(rb'<a\s(?:[^>]*?\s)?href=["\']([^"\']+)["\']', re.IGNORECASE)  # Links in the launcher html
+SANITIZE_PATTERN = re.compile(r'[^0-9a-zA-Z]+')  # Characters stripped from mod names for their -mod= directory
+CHANGELOG_PATTERN = re.compile(rb'workshopAnnouncement.*?<p id="(\d+)">', re.DOTALL)  # Latest changelog timestamp
+REQUEST_TIMEOUT = 30  # Seconds before a Steam Workshop request is given up on.
+CACHE_FILE = Path.home() / '.cache/arma3modtools/changelogs.json'  # Changelog results kept between runs.
+CHANGELOG_CACHE_TTL = 900  # Seconds a cached changelog result is trusted before asking the Steam Workshop again.
+
+SESSION = requests.Session()  # Shared by every Steam Workshop request so connections are reused between threads.
+SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=64))
+mod_dict_lock = threading.Lock()  # Guards the mod dictionary being built.
+changelog_cache = {}  # Changelog results by mod key, shared between request threads.
+changelog_cache_lock = threading.Lock()
+changelog_cache_changed = False  # Set once a changelog result is written this run, so the cache file is worth saving.
 
 parser = argparse.ArgumentParser(
     prog='arma3modtools',
@@ -28,25 +52,25 @@ parser = argparse.ArgumentParser(
 parser.add_argument('-f', '--html-file', action='store', dest='html_file',
                     help='Update and install mods with an Arma 3 Launcher-made html mod list.')
 parser.add_argument('-v', '--validate', action='store_true', dest='validate_mods',
-                    help='Validate existing mods in the workshop directory.')
+                    help='Validate existing mods in the workshop directory. '
+                         'With -f, validate every mod in the list after updating.')
 parser.add_argument('-k', '--key-symlinks', action='store_true', dest='validate_key_links',
                     help='Clean up and create new keys based on mods in the workshop directory.')
 arguments = parser.parse_args()
 
 
-def call_steamcmd(launch_params: str):
+def call_steamcmd(launch_params: list):
     """
     Call the steamcmd client and run parameters against the client call
 
-    :param launch_params: String list of parameters
-    :raises subprocess.CalledProcessError: If steamcmd ends unexpectedly.
+    :param launch_params: **list** Arguments passed to steamcmd, one list item per argument.
     :return: **bool** Whether or not steamcmd successfully runs
     """
     try:
-        with subprocess.Popen([f'{STEAM_CMD}', f'{launch_params}']) as steamcmd:
-            steamcmd.wait()
-        return True
-    except subprocess.CalledProcessError as error:
+        # Arguments are handed straight to steamcmd, no shell is spawned to split them.
+        steamcmd = subprocess.run([STEAM_CMD, *launch_params], check=False)
+        return steamcmd.returncode == 0
+    except OSError as error:
         print(error)
         return False
 
@@ -59,88 +83,182 @@ def mod_list_from_html(import_file: str):
     :return: **list** A list of all links in the mod-list. False, if operation fails.
     """
     try:
-        mod_link_list = []
-        with open(import_file, 'r') as html_file:
-            # Parse html file with beautiful soup and pull out all hrefs under a tags.
-            soup = BeautifulSoup(html_file, 'html.parser')
-            for link in soup.find_all('a'):
-                mod_link_list.append(link.get('href'))
-        return mod_link_list
+        with open(import_file, 'rb') as html_file:
+            # Pull out all hrefs under a tags, the launcher's html is simple enough to not need a parser.
+            return [html.unescape(link.decode('utf-8')) for link in HREF_PATTERN.findall(html_file.read())]
     except IOError as error:
         print(error)
         return False
 
 
+def to_param_name(mod_name: str):
+    """
+    Sanitizes a mod's name into the directory name used for it in the ```MODS_DIR``` and the -mod= parameter.
+
+    :param mod_name: **str** The mod's name on the Steam Workshop.
+    :return: **str** The name stripped to lowercase alphanumerics and prefixed with '@'.
+    """
+    return f'@{SANITIZE_PATTERN.sub("", mod_name).lower()}'
+
+
 def mod_data_getter(mod_url: str, mod_dict: dict):
     """
-    Thread function for ```mod_dictionary_builder```, runs concurrently to grab up-to-date information for mods.
+    Thread function for ```mod_dictionary_builder```, runs concurrently to grab up-to-date information for mods. Also
+    checks the mod's changelog through ```needs_update``` and stores the result as ```needs_update```, which
+    ```update_mods``` relies on.
     :param mod_url: The Steam Workshop url for the mod.
     :param mod_dict: The dictionary being built from ```mod_dictionary_builder```, not a completed dictionary
     """
     try:
         if mod_url is not None:
+            mod_key = mod_url.replace('https://steamcommunity.com/sharedfiles/filedetails/?id=', '')
             dependencies = []
             # Refresh dependencies dictionary with each mod
 
-            with urllib.request.urlopen(mod_url) as response:
+            with SESSION.get(mod_url, timeout=REQUEST_TIMEOUT) as response:
                 # Gather information about the mod from the steam workshop web page
-                html = response.read()
-                mod_soup = BeautifulSoup(html, 'html.parser')
-                mod_name = mod_soup.find("div", {"class": "workshopItemTitle"}).string
-                required_items = mod_soup.find(id="RequiredItems")
-                if required_items is not None:
-                    # Check to see if there are any dependencies for the mod.
-                    dependency_links = required_items.find_all('a')
-                    for link in dependency_links:
-                        depend_url = link.get('href')
-                        with urllib.request.urlopen(depend_url) as dependency:
-                            dependency_soup = BeautifulSoup(dependency, 'html.parser')
-                            depend_name = dependency_soup.find("div", {"class": "workshopItemTitle"}).string
-                            dependency = {
-                                'name': depend_name,
-                                'param_name': '@' + re.sub('[^0-9a-zA-Z]+', '', depend_name).lower(),
-                                'key': depend_url.replace(
-                                    'https://steamcommunity.com/workshop/filedetails/?id=', ''),
-                                'url': depend_url
-                            }
-                            dependencies.append(dependency)
+                response.raise_for_status()
+                mod_tree = LexborHTMLParser(response.content)
+                mod_name = mod_tree.css_first('div.workshopItemTitle').text()
+                # Check to see if there are any dependencies for the mod.
+                for link in mod_tree.css('#RequiredItems a'):
+                    # The Required Items link text is the dependency's title, so its page isn't requested.
+                    depend_url = link.attributes.get('href')
+                    depend_name = link.text(strip=True)
+                    dependency = {
+                        'name': depend_name,
+                        'param_name': to_param_name(depend_name),
+                        'key': depend_url.replace('https://steamcommunity.com/workshop/filedetails/?id=', ''),
+                        'url': depend_url
+                    }
+                    dependencies.append(dependency)
             mod_details = {
                 'name': mod_name,
-                'param_name': '@' + re.sub('[^0-9a-zA-Z]+', '', mod_name).lower(),
-                'key': mod_url.replace('https://steamcommunity.com/sharedfiles/filedetails/?id=', ''),
+                'param_name': to_param_name(mod_name),
+                'key': mod_key,
                 'url': mod_url,
-                'dependencies': dependencies
+                'dependencies': dependencies,
+                # Checked here so the changelog request runs in the same pool as the mod information requests.
+                'needs_update': needs_update(mod_key)
             }
-            mod_dict[mod_url.replace('https://steamcommunity.com/sharedfiles/filedetails/?id=', '')] = mod_details
-    except (TimeoutError, urllib.error.URLError) as error:
+            with mod_dict_lock:
+                mod_dict[mod_key] = mod_details
+    except requests.RequestException as error:
         print(error)
 
 
 def mod_dictionary_builder(mod_list: list):
     """
     Builds the mod dictionary from a list of url strings linking to steam workshop pages. Calls ```mod_data_getter``` in
-    separate strings to speed up the process.
+    a bounded pool of threads to speed up the process.
 
     :param mod_list: A list of url strings, point to steam workshop pages.
     :return: **dict** All mods in the mod-list as dictionaries.
     """
-    threads = []
     mod_dict = {}
-    i = 1
-    print('REQUEST: Sending out requests for mod information.')
+    # Drop mods listed more than once before any request goes out, keeping the first url for each mod key.
+    unique_urls = {}
     for mod_url in mod_list:
-        thread = threading.Thread(target=mod_data_getter, args=(mod_url, mod_dict))
-        thread.start()
-        threads.append(thread)
-
-    for result in threads:
-        print(f'\rREQUEST: Returned {i}/{len(mod_list)} mods', end='', flush=True)
-        result.join()
-        i += 1
+        if mod_url is not None:
+            unique_urls.setdefault(mod_url.replace('https://steamcommunity.com/sharedfiles/filedetails/?id=', ''),
+                                   mod_url)
+    print('REQUEST: Sending out requests for mod information.')
+    with ThreadPoolExecutor(max_workers=MOD_REQUEST_THREADS) as executor:
+        futures = {executor.submit(mod_data_getter, mod_url, mod_dict): mod_url for mod_url in unique_urls.values()}
+        # Count mods as they return rather than waiting on them in submission order.
+        for i, future in enumerate(as_completed(futures), 1):
+            print(f'\rREQUEST: Returned {i}/{len(futures)} mods', end='', flush=True)
+            try:
+                future.result()
+            except Exception as error:
+                # Report the failed mod rather than letting it drop out of the dictionary silently.
+                print(f'\nREQUEST ERROR: Could not get information for {futures[future]}: {error!r}')
     print('')
     return mod_dict
 
 
+def load_changelog_cache():
+    """
+    Loads changelog results saved by previous runs from ```CACHE_FILE```. A missing or unreadable cache is ignored,
+    as is any entry not shaped like the ones ```fetch_updated_at``` writes.
+    """
+    try:
+        with open(CACHE_FILE, 'r') as cache_file:
+            saved_cache = json.load(cache_file)
+    except (IOError, ValueError):
+        return
+    if not isinstance(saved_cache, dict):
+        return
+    for mod_key, entry in saved_cache.items():
+        if (isinstance(entry, dict)
+                and isinstance(entry.get('fetched_at'), (int, float))
+                and isinstance(entry.get('since'), (int, float))
+                and isinstance(entry.get('updated', ''), (int, type(None)))):
+            changelog_cache[mod_key] = entry
+
+
+def save_changelog_cache():
+    """
+    Saves the changelog results to ```CACHE_FILE``` so the next run can skip recently checked mods. Nothing is written
+    unless ```fetch_updated_at``` stored a result this run, and results older than ```CHANGELOG_CACHE_TTL``` are
+    dropped, so mods that have left the mod list don't stay in the file.
+    """
+    if not changelog_cache_changed:
+        return
+    expired_before = time.time() - CHANGELOG_CACHE_TTL
+    with changelog_cache_lock:
+        fresh_cache = {mod_key: entry for mod_key, entry in changelog_cache.items()
+                       if entry['fetched_at'] >= expired_before}
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(CACHE_FILE, 'w') as cache_file:
+            json.dump(fresh_cache, cache_file)
+    except IOError as error:
+        print(error)
+
+
+def fetch_updated_at(mod_key: str, since: datetime):
+    """
+    Pulls the last update time of a mod from its changelist page on the Steam Workshop. The request is made
+    conditional on the page changing after ```since```, so an unchanged page is not downloaded or parsed. Results
+    younger than ```CHANGELOG_CACHE_TTL``` are answered from the changelog cache without a request.
+
+    :param mod_key: **str** The key of the mod to be checked.
+    :param since: **datetime** When the local copy of the mod was downloaded.
+    :return: **datetime** When the mod was last updated on the Workshop, None if unchanged since ```since```.
+    :raises requests.RequestException: If the request for the changelist page fails or times out.
+    :raises ValueError: If the changelist page has no update entries.
+    """
+    global changelog_cache_changed
+    with changelog_cache_lock:
+        cached = changelog_cache.get(mod_key)
+    if cached is not None and time.time() - cached['fetched_at'] < CHANGELOG_CACHE_TTL:
+        if cached['updated'] is not None:
+            return datetime.fromtimestamp(cached['updated'])
+        if cached['since'] <= since.timestamp():
+            # Unchanged since an earlier download means unchanged since this one as well.
+            return None
+    updated = None
+    with SESSION.get(f'https://steamcommunity.com/sharedfiles/filedetails/changelog/{mod_key}',
+                     headers={'If-Modified-Since': formatdate(since.timestamp(), usegmt=True)},
+                     timeout=REQUEST_TIMEOUT) as response:
+        if response.status_code != 304:  # Not Modified
+            response.raise_for_status()
+            # Search the raw bytes, the page is never decoded or parsed into a tree.
+            match = CHANGELOG_PATTERN.search(response.content)
+            if match is None:
+                raise ValueError(f'No changelog entries found for mod {mod_key}.')
+            updated = int(match.group(1))
+    with changelog_cache_lock:
+        changelog_cache[mod_key] = {
+            'fetched_at': time.time(),
+            'since': since.timestamp(),
+            'updated': updated
+        }
+        changelog_cache_changed = True
+    return datetime.fromtimestamp(updated) if updated is not None else None
+
+
 def needs_update(mod_key: str):
     """
     Checks a mod's changelist page on the Steam Workshop and pulls the last update time and compares it when the
@@ -148,24 +266,19 @@ def needs_update(mod_key: str):
 
     :param mod_key: **str** The key of the mod to be checked.
     :return: **bool** Whether or not the mod needs an update.
-    :raises TimeoutError: If the request for the changelist page times out.
-    :raises FileNotFoundError: If the directory does not exist.
-    :raises urllib.error.URLError: If a separate error through urllib happens as a result of the request.
     """
-    mod_home_dir = Path(PurePath.joinpath(WORKSHOP_DIR, mod_key))
-    if mod_home_dir.is_dir():  # Check if mod is installed in the workshop directory.
+    try:
+        # One stat answers both whether the mod is installed and when it was downloaded.
+        mod_home_stat = os.stat(PurePath.joinpath(WORKSHOP_DIR, mod_key))
+    except FileNotFoundError:
+        return True
+    if stat.S_ISDIR(mod_home_stat.st_mode):  # Check if mod is installed in the workshop directory.
         try:
-            with urllib.request.urlopen(
-                    'https://steamcommunity.com/sharedfiles/filedetails/changelog/' + mod_key) as response:
-                html = response.read()
-                soup = BeautifulSoup(html, 'html.parser')
-                updated = datetime.fromtimestamp(int(
-                    soup.find("div", {"class": "detailBox workshopAnnouncement noFooter"}).p['id']))
-                downloaded = datetime.fromtimestamp(mod_home_dir.stat().st_ctime)
-                return updated >= downloaded
-        except (TimeoutError,
-                urllib.error.URLError,
-                FileNotFoundError) as error:
+            downloaded = datetime.fromtimestamp(mod_home_stat.st_ctime)
+            updated = fetch_updated_at(mod_key, downloaded)
+            return updated is not None and updated >= downloaded
+        except (requests.RequestException,
+                ValueError) as error:
             print(error)
     return True
 
@@ -174,7 +287,7 @@ def get_login():
     """
     Get login information from user. Will only accept 'LOGIN PASSWORD' or 'LOGIN PASSWORD STEAM_GUARD' combinations.
 
-    :return: **str** login string for SteamCMD login variable, false if the operation does not succeed.
+    :return: **list** login arguments for the SteamCMD +login command, false if the operation does not succeed.
     """
     print('LOGIN: Account should have a valid copy of the game to download mods.')
     username = input('Username: ')
@@ -186,9 +299,9 @@ def get_login():
         print('LOGIN FAILURE: No password entry.')
         return False
     steam_guard = input('Steam Guard Code (Optional): ')
-    credentials = f'{username} {password}'
+    credentials = [username, password]
     if steam_guard:
-        credentials += f' {steam_guard}'
+        credentials.append(steam_guard)
     return credentials
 
 
@@ -196,83 +309,95 @@ def check_installed_dirs(mod_list: list):
     """
     Checks the ```WORKSHOP_DIR``` to see if all mods successfully installed.
 
-    :param mod_list: The full mod dictionary
+    :param mod_list: A list of key ids for mods that should be installed
     :return: A list of yet-to-be-installed mods, or an empty one if all mods installed.
     """
     print('UPDATE: Checking if all mods installed.')
-    to_install = mod_list
-    for installed_mod in Path(WORKSHOP_DIR).iterdir():
-        if installed_mod.name in to_install:
-            index = to_install.index(installed_mod.name)
-            to_install.pop(index)
-    return to_install
+    with os.scandir(WORKSHOP_DIR) as workshop_entries:
+        installed_mods = {installed_mod.name for installed_mod in workshop_entries}
+    # Build a new list rather than popping from mod_list, the caller's list is left as it was.
+    return [mod for mod in mod_list if mod not in installed_mods]
 
 
-def run_update(mod_list: list, validate: bool=False):
+def run_update(mod_list: list, login: list, validate_list: list=()):
     """
-    Runs an update cycle for steamcmd, requesting credentials for each batch of update files.
+    Runs an update cycle for steamcmd with credentials gathered once by the caller. Downloads and validations share a
+    single SteamCMD session, so Steam is only logged into once.
 
-    :param mod_list: **list** A list of key ids for mods on the workshop
-    :param validate: **bool** Whether or not to run validation.
+    :param mod_list: **list** A list of key ids for mods on the workshop to download.
+    :param login: **list** Login arguments from ```get_login```.
+    :param validate_list: **list** A list of key ids for mods on the workshop to validate after the downloads.
+    :return: **bool** Whether or not steamcmd successfully runs
     """
-    login_string = get_login()
-    if not login_string:
-        # If get_login() fails.
-        print('EXIT: User/pass needed for mod downloads.')
-        return False
-    steamcmd_params = f' +login {login_string}' \
-                      f' +force_install_dir {SERVER_DIR}'
+    steamcmd_params = ['+login', *login,
+                       '+force_install_dir', str(SERVER_DIR)]
     for mod in mod_list:
-        if not validate:
-            steamcmd_params += f' +workshop_download_item {WORKSHOP_ID} {mod}'
-        else:
-            steamcmd_params += f' +workshop_download_item {WORKSHOP_ID} {mod} validate'
-    steamcmd_params += ' +quit'
-    call_steamcmd(steamcmd_params)
+        steamcmd_params += ['+workshop_download_item', WORKSHOP_ID, mod]
+    for mod in validate_list:
+        steamcmd_params += ['+workshop_download_item', WORKSHOP_ID, mod, 'validate']
+    steamcmd_params.append('+quit')
+    return call_steamcmd(steamcmd_params)
 
 
 def update_mods(mod_dict: dict):
     """
-    Updates the mods in the mod list dictated by the mod dictionary. The mod list is checked for up to date mods
-    and then appends workshop_download_item commands to the end of the steamcmd string for each mod that needs
-    to be installed
+    Updates the mods in the mod list dictated by the mod dictionary. The mod list is split by each mod's
+    ```needs_update``` result and then appends workshop_download_item commands to the end of the steamcmd string for
+    each mod that needs to be installed
 
-    :param mod_dict: The full mod dictionary.
+    :param mod_dict: The full mod dictionary from ```mod_dictionary_builder```, needs each mod's ```needs_update```.
     :return: **bool** If procedure succeeds.
     """
     mods_to_update = []
     mods_up_to_date = []
-    mods_to_validate = []
-    mod_num = 1
     for key, value in mod_dict.items():
-        print(f'\rUPDATE: Checking {mod_num}/{len(mod_dict.items())} mods for updates.', end='', flush=True)
-        if needs_update(key):
+        # Mods were checked for updates by ```mod_data_getter``` when the dictionary was built.
+        if value['needs_update']:
             mods_to_update.append(key)
         else:
             mods_up_to_date.append(key)
-        mod_num += 1;
-    for mod in mod_dict.keys():
-        mods_to_validate.append(mod)
-    print('\n')
-    if len(mods_up_to_date) == len(mod_dict):
+    # Validation re-checks every file of every mod, it only runs when asked for.
+    mods_to_validate = list(mod_dict) if arguments.validate_mods else []
+    if not mods_to_update and not mods_to_validate:
+        # Nothing to download or validate, skip the login prompt and the SteamCMD launch.
         print('UPDATE: All mods are up-to-date.')
         return True
     elif mods_up_to_date:
         print('UPDATE: The following mod(s) are up-to-date:')
         for installed_mod in mods_up_to_date:
             print(f'\t{mod_dict[installed_mod]["name"]}')
+    # Ask for credentials once, every SteamCMD batch below reuses them.
+    login = get_login()
+    if not login:
+        # If get_login() fails.
+        print('EXIT: User/pass needed for mod downloads.')
+        return False
     if mods_to_update:
         print('UPDATE: Installing mods through SteamCMD.')
-        run_update(mods_to_update)
-    while True:
-        not_installed_mods = check_installed_dirs(mods_to_update)
-        if not_installed_mods:
-            print('UPDATE: Not all mods installed, trying again.')
-            run_update(mods_to_update)
-        else:
-            break
-    print('UPDATE: Validating mods')
-    run_update(mods_to_validate, validate=True)
+    if mods_to_validate:
+        print('UPDATE: Validating mods through SteamCMD.')
+    # A download that fails partway, such as a timed-out large item, also fails the session. Which mods still need
+    # a retry is decided from the workshop directory rather than from the exit status.
+    finished = run_update(mods_to_update, login, mods_to_validate)
+    if not finished:
+        print('UPDATE: SteamCMD did not finish successfully, checking which mods installed.')
+    attempt = 1
+    not_installed_mods = check_installed_dirs(mods_to_update)
+    if not finished and len(not_installed_mods) == len(mods_to_update):
+        # Nothing the session was given got installed, a failed login would only repeat on every retry.
+        print('UPDATE ERROR: SteamCMD did not install any mods, shutting down.')
+        return False
+    while not_installed_mods:
+        if attempt >= MAX_INSTALL_ATTEMPTS:
+            print(f'UPDATE ERROR: {len(not_installed_mods)} mod(s) failed to install after {attempt} attempts.')
+            return False
+        print(f'UPDATE: Not all mods installed, trying again for {len(not_installed_mods)} mod(s).')
+        time.sleep(min(60, 2 ** attempt))  # Back off between batches rather than hammering Steam.
+        # Only re-issue the batch for mods that are still missing from the workshop directory.
+        if not run_update(not_installed_mods, login):
+            print('UPDATE: SteamCMD did not finish successfully, checking which mods installed.')
+        not_installed_mods = check_installed_dirs(not_installed_mods)
+        attempt += 1
     print('UPDATE: Mod updates finished.')
     print('UPDATE: Converting file and directory names to lowercase.')
     if not lowercase_mods():
@@ -289,15 +414,24 @@ def create_mod_symlinks(mod_dict: dict):
     :return: **bool** Whether or not the function succeeds
     """
     print('MOD SYMLINKS: Checking if current mod links are valid.')
-    for mod in Path(MODS_DIR).iterdir():
-        if not mod.is_dir():
-            print(f'KEY SYMLINKS: Unlinking broken link: {mod}')
-            mod.unlink()
+    with os.scandir(MODS_DIR) as mod_entries:
+        for mod in mod_entries:
+            if not mod.is_dir():
+                print(f'KEY SYMLINKS: Unlinking broken link: {mod.path}')
+                os.unlink(mod.path)
+    # One directory listing of the workshop replaces an is_dir stat per mod.
+    with os.scandir(WORKSHOP_DIR) as workshop_entries:
+        installed_mods = {entry.name for entry in workshop_entries if entry.is_dir(follow_symlinks=False)}
     for key, value in mod_dict.items():
         link_path = Path(MODS_DIR / value["param_name"])
         real_path = Path(WORKSHOP_DIR / key)
+        try:
+            if os.readlink(link_path) == str(real_path):
+                continue  # Link is already in place, skip checking either directory.
+        except OSError:
+            pass  # No link at link_path yet.
         if not link_path.is_dir():
-            if real_path.is_dir():
+            if key in installed_mods:
                 link_path.symlink_to(real_path)
                 print(f'MOD SYMLINKS: Creating symlink at: {link_path}')
             else:
@@ -305,6 +439,27 @@ def create_mod_symlinks(mod_dict: dict):
     return True
 
 
+def workshop_bikeys():
+    """
+    Finds all bikey files two directories deep in the ```WORKSHOP_DIR```, as in <mod>/<keys>/<name>.bikey. Walks the
+    three levels with os.scandir, so entry types come from the directory listings rather than a stat per entry.
+
+    :return: **list** os.DirEntry for each bikey file.
+    """
+    bikeys = []
+    with os.scandir(WORKSHOP_DIR) as mod_entries:
+        for mod in mod_entries:
+            if not mod.is_dir():
+                continue
+            with os.scandir(mod.path) as sub_entries:
+                for sub_directory in sub_entries:
+                    if not sub_directory.is_dir():
+                        continue
+                    with os.scandir(sub_directory.path) as file_entries:
+                        bikeys.extend(entry for entry in file_entries if entry.name.endswith('.bikey'))
+    return bikeys
+
+
 def key_symlinks():
     """
     Creates symlinks from the key files in the workshop directory to the key files in the ```KEYS_DIR```
@@ -312,32 +467,51 @@ def key_symlinks():
     :return: **bool** Whether or not the operation finishes successfully.
     """
     print('KEY SYMLINKS: Checking if current keys are valid.')
-    for key in Path(KEYS_DIR).iterdir():
-        if not key.is_file():
-            print(f'KEY SYMLINKS: Unlinking broken key: {key}')
-            key.unlink()
-    # Glob all bikey files in the ```WORKSHOP DIR```
-    bikey_files = Path(WORKSHOP_DIR).glob('*/*/*.bikey')
-    for key in bikey_files:
-        symlink_key = Path(KEYS_DIR / key.name)
-        if not symlink_key.is_file():
+    linked_keys = set()
+    with os.scandir(KEYS_DIR) as key_entries:
+        for key in key_entries:
+            if not key.is_file():
+                print(f'KEY SYMLINKS: Unlinking broken key: {key.path}')
+                os.unlink(key.path)
+            else:
+                linked_keys.add(key.name)
+    for key in workshop_bikeys():
+        if key.name not in linked_keys:
+            symlink_key = Path(KEYS_DIR / key.name)
             print(f'KEY SYMLINKS: Creating symlink at: {symlink_key}')
-            symlink_key.symlink_to(key)
+            symlink_key.symlink_to(key.path)
+            linked_keys.add(key.name)
     return True
 
 
+def lowercase_directory(directory: str):
+    """
+    Thread function for ```lowercase_mods```, recursively sets all directories and files in a single mod's directory
+    to lowercase.
+
+    :param directory: The mod's directory in the ```WORKSHOP_DIR```.
+    """
+    # Walk bottom-up so a directory's contents are renamed before the directory itself.
+    for root, dirs, files in os.walk(directory, topdown=False):
+        for name in files + dirs:
+            lowered_name = name.lower()
+            if lowered_name != name:
+                os.rename(os.path.join(root, name), os.path.join(root, lowered_name))
+
+
 def lowercase_mods():
     """
-    Recursively set all directories and files in the ```WORKSHOP_DIR``` to lowercase
+    Recursively set all directories and files in the ```WORKSHOP_DIR``` to lowercase. Each mod's directory is walked
+    in its own thread, mod directories never share entries so their renames can't collide.
 
     :return: True function successfully finishes.
     """
     if Path(WORKSHOP_DIR).is_dir():
-        for directory in Path(WORKSHOP_DIR).iterdir():
-            for item in directory.rglob('*'):
-                lowered_item = item.name.lower()
-                parent_path = item.parent
-                item.replace(parent_path / lowered_item)
+        with os.scandir(WORKSHOP_DIR) as workshop_entries:
+            mod_directories = [entry.path for entry in workshop_entries if entry.is_dir(follow_symlinks=False)]
+        with ThreadPoolExecutor(max_workers=LOWERCASE_THREADS) as executor:
+            # Consume the results so an error renaming in any thread is raised here.
+            list(executor.map(lowercase_directory, mod_directories))
         return True
     else:
         print('UPDATE: No workshop folder detected.')
@@ -351,24 +525,15 @@ def dependency_sort(mod_dict: dict):
     :param mod_dict: The full mod dictionary.
     :return: A string to be used for the mod= parameter
     """
-    load_order = ''
     dictionary = mod_dict
-    graph = nx.DiGraph()
+    sorter = TopologicalSorter()
     for key, value in dictionary.items():
-        # Add mods to a directed graph. NetworkX will ignore nodes that are already made.
-        graph.add_node(value['param_name'])
-        for dependent in value['dependencies']:
-            # Add the mods dependencies and create directed edges.
-            graph.add_node(dependent['param_name'])
-            graph.add_edge(dependent['param_name'], value['param_name'])
-    load_order_list = list(nx.topological_sort(graph))
+        # Add mods with their dependencies as predecessors, so dependencies load first. Repeated nodes are merged.
+        sorter.add(value['param_name'], *[dependent['param_name'] for dependent in value['dependencies']])
+    load_order_list = list(sorter.static_order())
     relative_mod_path = MODS_DIR.relative_to(SERVER_DIR)
     # Capture relative path of ```MODS_DIR``` to ```SERVER_DIR``
-    for mod in load_order_list:
-        if mod is not load_order_list[0]:
-            load_order += ';'
-        load_order += str(relative_mod_path / mod)
-    return load_order
+    return ';'.join(str(relative_mod_path / mod) for mod in load_order_list)
 
 
 def write_start_up_script(load_order: str):
@@ -378,7 +543,7 @@ def write_start_up_script(load_order: str):
     :param load_order: **str** The mod= string value.
     :return: **bool** Whether the process succeeds or fails.
     """
-    load_order = '-mod=\"' + load_order + '\"'
+    load_order = f'-mod="{load_order}"'
     with open(PARAM_FILE, 'w') as write_script:
         write_script.write(load_order)
     return True
@@ -424,12 +589,22 @@ def validate_mods():
     Validates mods in the ```WORKSHOP_DIR``` by calling workshop_download_mod validate on each mod installed.
     :return:
     """
-    workshop_mods = []
-    for installed_mod in Path(WORKSHOP_DIR).iterdir():
-        workshop_mods.append(installed_mod.name)
+    with os.scandir(WORKSHOP_DIR) as workshop_entries:
+        workshop_mods = [installed_mod.name for installed_mod in workshop_entries]
+    if not workshop_mods:
+        # Nothing to validate, skip the login prompt and the SteamCMD launch.
+        print('VALIDATE: No workshop mods installed.')
+        return True
+    login = get_login()
+    if not login:
+        # If get_login() fails.
+        print('EXIT: User/pass needed for mod validation.')
+        return False
     print(f'VALIDATE: Validating {len(workshop_mods)} workshop mods.')
-    run_update(workshop_mods, True)
-    print(f'VALIDATE: Converting file and directory names to lowercase.')
+    if not run_update([], login, workshop_mods):
+        print('VALIDATE ERROR: SteamCMD did not finish successfully, shutting down.')
+        return False
+    print('VALIDATE: Converting file and directory names to lowercase.')
     if not lowercase_mods():
         print('UPDATE: Could not successfully lowercase all/any mods.')
         return False
@@ -437,6 +612,8 @@ def validate_mods():
 
 
 if __name__ == '__main__':
+    load_changelog_cache()
+    atexit.register(save_changelog_cache)
     if arguments.html_file:
         run_html_mod_update()
     elif arguments.validate_mods: